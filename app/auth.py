@@ -207,14 +207,13 @@ def api_2fa_login_verify():
 @login_required
 def api_get_current_user():
     """Get current logged-in user's profile"""
-    import json
     return jsonify({
         "id": current_user.id,
         "username": current_user.username,
         "email": current_user.email,
         "role": current_user.role,
         "location": current_user.location,
-        "locations": json.loads(current_user.location) if current_user.location else [],
+        "locations": current_user.parsed_locations,
     })
 
 
@@ -222,7 +221,6 @@ def api_get_current_user():
 @login_required
 @admin_required
 def api_list_users():
-    import json
     users = User.query.order_by(User.created_at.desc()).all()
     return jsonify([
         {
@@ -232,7 +230,7 @@ def api_list_users():
             "email": user.email,
             "role": user.role,
             "location": user.location,
-            "locations": json.loads(user.location) if user.location else [],  # Parse JSON array
+            "locations": user.parsed_locations,  # Parse JSON array
             "two_factor_enabled": user.two_factor_enabled,
             "two_factor_setup_complete": user.two_factor_setup_complete,
             "status": "Active",  # Default status
@@ -6,6 +6,11 @@ from sqlalchemy import func
 
 admin_metrics_bp = Blueprint("admin_metrics", __name__)
 
+def _invalidate_overheads():
+    """Retire memoized overhead totals after a FinancialMetric write"""
+    from app.routes import invalidate_financial_metric_caches
+    invalidate_financial_metric_caches()
+
 @admin_metrics_bp.route("/api/admin/targets", methods=["GET"])
 @login_required
 @admin_required
@@ -126,6 +131,7 @@ def set_financial_metric():
             db.session.add(metric)
             
         db.session.commit()
+        _invalidate_overheads()
         return jsonify({"message": "Financial metric saved successfully"}), 200
     except Exception as e:
         db.session.rollback()
@@ -142,6 +148,7 @@ def delete_financial_metric(id):
             
         db.session.delete(metric)
         db.session.commit()
+        _invalidate_overheads()
         return jsonify({"message": "Metric deleted successfully"}), 200
     except Exception as e:
         db.session.rollback()
@@ -188,18 +195,8 @@ def get_target_performance():
         # RBAC Filter for non-admins
         if current_user.role not in ['admin', 'superadmin']:
             if current_user.location:
-                # Parse location JSON if needed
-                import json
-                try:
-                    user_locs = json.loads(current_user.location)
-                    if isinstance(user_locs, list):
-                        actual_query = actual_query.filter(DimJob.location.in_(user_locs))
-                    else:
-                        # Fallback if it's a single string (legacy or simple case)
-                        actual_query = actual_query.filter(DimJob.location == str(user_locs))
-                except (json.JSONDecodeError, TypeError):
-                     # Not JSON, treat as exact string match
-                     actual_query = actual_query.filter(DimJob.location == current_user.location)
+                # JSON list, or a legacy single name (parsed_locations handles both)
+                actual_query = actual_query.filter(DimJob.location.in_(current_user.parsed_locations))
         
         actual_query = actual_query.group_by(
             DimDate.year, DimDate.month, DimJob.location, DimJob.site
@@ -295,15 +292,7 @@ def get_target_achievement_trend():
         # RBAC Filter
         if current_user.role not in ['admin', 'superadmin']:
             if current_user.location:
-                import json
-                try:
-                    user_locs = json.loads(current_user.location)
-                    if isinstance(user_locs, list):
-                        actual_query = actual_query.filter(DimJob.location.in_(user_locs))
-                    else:
-                        actual_query = actual_query.filter(DimJob.location == str(user_locs))
-                except (json.JSONDecodeError, TypeError):
-                     actual_query = actual_query.filter(DimJob.location == current_user.location)
+                actual_query = actual_query.filter(DimJob.location.in_(current_user.parsed_locations))
         
         actual_query = actual_query.group_by(
             DimDate.year, DimDate.month, DimJob.location, DimJob.site
@@ -425,15 +414,7 @@ def get_overheads_pareto():
         if current_user.role not in ['admin', 'superadmin']:
              if current_user.location:
                 # Same RBAC logic as targets
-                import json
-                try:
-                    user_locs = json.loads(current_user.location)
-                    if isinstance(user_locs, list):
-                        query = query.filter(FinancialMetric.location.in_(user_locs))
-                    else:
-                        query = query.filter(FinancialMetric.location == str(user_locs))
-                except:
-                     query = query.filter(FinancialMetric.location == current_user.location)
+                query = query.filter(FinancialMetric.location.in_(current_user.parsed_locations))
 
         # Apply Request Filters (Locations/Sites) 
         req_locations = request.args.getlist('locations')
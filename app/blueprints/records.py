@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
 from sqlalchemy import or_, desc, asc, text
-from app.models import db, FactShift, DimEmployee, DimClient, DimJob, DimDate, DimShift
+from sqlalchemy.orm import contains_eager
+from app.models import db, FactShift, FactShiftDaily, DimEmployee, DimClient, DimJob, DimDate, DimShift
 from app.utils.filters import apply_dashboard_filters
 from app.auth import manager_required, admin_required
 from datetime import datetime
@@ -53,6 +54,10 @@ def api_records():
             DimDate, FactShift.date_id == DimDate.date_id
         ).join(
             DimShift, FactShift.shift_id == DimShift.shift_id
+        ).options(
+            # DimJob is already joined above; populate fact.job from it so the
+            # jobName lookup below does not lazy-load one job per row
+            contains_eager(FactShift.job)
         )
 
         # 3. Apply Filters
@@ -239,7 +244,8 @@ def create_record():
         )
         
         db.session.add(new_record)
-        db.session.commit()
+        # Re-sums the date into the dashboard rollup and commits both together
+        FactShiftDaily.refresh({new_record.date_id})
         
         return jsonify({"message": "Record created", "id": new_record.shift_record_id}), 201
         
@@ -260,6 +266,7 @@ def update_record(id):
             
         data = request.json
         is_admin = current_user.role == 'admin'
+        old_date_id = record.date_id
         
         if 'date' in data:
             date_str = data['date']
@@ -300,7 +307,8 @@ def update_record(id):
                 record.client_hourly_rate = float(data['clientHourlyRate'])
                 record.client_net = record.client_hourly_rate * (record.paid_hours or 0)
                 
-        db.session.commit()
+        # A moved record leaves its old date as well as joining the new one
+        FactShiftDaily.refresh({old_date_id, record.date_id})
         return jsonify({"message": "Record updated"}), 200
     except Exception as e:
         db.session.rollback()
@@ -316,8 +324,9 @@ def delete_record(id):
         if not record:
             return jsonify({"error": "Record not found"}), 404
         
+        date_id = record.date_id
         db.session.delete(record)
-        db.session.commit()
+        FactShiftDaily.refresh({date_id})
         return jsonify({"message": "Record deleted"}), 200
     except Exception as e:
         db.session.rollback()
@@ -354,25 +363,22 @@ def delete_records_bulk():
         
         # RBAC: Filter by user's locations if not admin
         if current_user.role != 'admin':
-            try:
-                import json
-                user_locations = json.loads(current_user.location) if current_user.location else []
-                
-                # Validate all records are from user's locations
-                for record, location in records:
-                    if location and location not in user_locations:
-                        return jsonify({"error": "Unauthorized to delete some records"}), 403
-            except Exception as e:
-                current_app.logger.error(f"RBAC validation error: {e}")
-                return jsonify({"error": "Permission validation failed"}), 500
+            user_locations = current_user.parsed_locations
+            
+            # Validate all records are from user's locations
+            for record, location in records:
+                if location and location not in user_locations:
+                    return jsonify({"error": "Unauthorized to delete some records"}), 403
         
         # Delete records
         deleted_count = 0
+        date_ids = set()
         for record, _ in records:
+            date_ids.add(record.date_id)
             db.session.delete(record)
             deleted_count += 1
         
-        db.session.commit()
+        FactShiftDaily.refresh(date_ids)
         
         return jsonify({"deleted": deleted_count}), 200
         
@@ -1,6 +1,5 @@
 from flask import Blueprint, request, jsonify, current_app
-import os
-from werkzeug.utils import secure_filename
+import tempfile
 from app.utils.data_loader import dbDataLoader
 
 upload_bp = Blueprint('upload', __name__)
@@ -21,35 +20,29 @@ def upload_file():
         return jsonify({'error': 'No selected file'}), 400
     
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        
-        # Save file temporarily
-        upload_folder = os.path.join(current_app.instance_path, 'uploads')
-        os.makedirs(upload_folder, exist_ok=True)
-        file_path = os.path.join(upload_folder, filename)
-        file.save(file_path)
+        # Buffer the upload in memory; only very large sheets spill to disk
+        buffer = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+        file.save(buffer)
+        buffer.seek(0)
         
         # Extract exclusions from form data (sent from frontend)
         import json
         excluded_locations = json.loads(request.form.get('excluded_locations', '[]'))
         excluded_clients = json.loads(request.form.get('excluded_clients', '[]'))
         
+        drop_indexes = current_app.config.get('BULK_LOAD_DROP_INDEXES', False)
+        
         def generate_response():
-            loader = dbDataLoader(excluded_locations, excluded_clients)
+            loader = dbDataLoader(excluded_locations, excluded_clients, drop_indexes=drop_indexes)
             try:
                 # Iterate through the generator
-                for status_update in loader.load_excel_data(file_path):
+                for status_update in loader.load_excel_data(buffer):
                     yield json.dumps(status_update) + '\n'
             except Exception as e:
                 # This catches any error in the generator itself if not handled there
                 yield json.dumps({"status": "error", "message": f"Upload error: {str(e)}"}) + '\n'
             finally:
-                # Clean up file after processing matches
-                if os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                    except:
-                        pass
+                buffer.close()
 
         from flask import Response, stream_with_context
         return Response(stream_with_context(generate_response()), mimetype='application/json')
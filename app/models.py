@@ -1,7 +1,12 @@
 ﻿from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import validates
 from datetime import datetime
+from functools import cached_property
+import json
 
 db = SQLAlchemy()
 
@@ -35,6 +40,26 @@ class User(UserMixin, db.Model):
     @property
     def is_admin(self):
         return self.role == 'admin'
+    
+    @cached_property
+    def parsed_locations(self):
+        """Assigned locations as a list, parsed once per loaded user.
+        
+        ``location`` holds a JSON array; legacy rows with a plain name (or a
+        JSON scalar) come back as a one-item list.
+        """
+        if not self.location:
+            return []
+        try:
+            value = json.loads(self.location)
+        except ValueError:
+            return [self.location]
+        return value if isinstance(value, list) else [str(value)]
+    
+    @validates('location')
+    def _reset_parsed_locations(self, key, value):
+        self.__dict__.pop('parsed_locations', None)
+        return value
 
 class DimEmployee(db.Model):
     __tablename__ = 'dim_employees'
@@ -69,6 +94,10 @@ class DimJob(db.Model):
     # Relationships
     shifts = db.relationship('FactShift', backref='job', lazy=True)
 
+    __table_args__ = (
+        db.Index('idx_job_location_site', 'location', 'site'),
+    )
+
 class DimShift(db.Model):
     __tablename__ = 'dim_shifts'
     
@@ -81,6 +110,19 @@ class DimShift(db.Model):
     # Relationships
     shifts = db.relationship('FactShift', backref='shift', lazy=True)
 
+# Period labels derived from the 'YYYY-MM-DD' date text. Plain substr/CASE
+# keeps them immutable, so Postgres can store them as generated columns.
+MONTH_LABEL_SQL = (
+    "CASE substr(\"date\", 6, 2) "
+    "WHEN '01' THEN 'Jan' WHEN '02' THEN 'Feb' WHEN '03' THEN 'Mar' "
+    "WHEN '04' THEN 'Apr' WHEN '05' THEN 'May' WHEN '06' THEN 'Jun' "
+    "WHEN '07' THEN 'Jul' WHEN '08' THEN 'Aug' WHEN '09' THEN 'Sep' "
+    "WHEN '10' THEN 'Oct' WHEN '11' THEN 'Nov' WHEN '12' THEN 'Dec' "
+    "END || ' ' || substr(\"date\", 1, 4)"
+)
+YEAR_LABEL_SQL = "substr(\"date\", 1, 4)"
+YYYY_MM_SQL = "substr(\"date\", 1, 7)"
+
 class DimDate(db.Model):
     __tablename__ = 'dim_dates'
     
@@ -89,11 +131,19 @@ class DimDate(db.Model):
     day = db.Column(db.String(20))
     month = db.Column(db.String(20))
     year = db.Column(db.Integer)
+    # 'Mon YYYY', 'YYYY' and 'YYYY-MM', filled in by the database (see migrate_dim_date_labels.py)
+    month_label = db.Column(db.String(8), db.Computed(MONTH_LABEL_SQL, persisted=True))
+    year_label = db.Column(db.String(4), db.Computed(YEAR_LABEL_SQL, persisted=True))
+    yyyy_mm = db.Column(db.String(7), db.Computed(YYYY_MM_SQL, persisted=True))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     shifts = db.relationship('FactShift', backref='date', lazy=True)
 
+    __table_args__ = (
+        db.Index('idx_dim_dates_yyyy_mm', 'yyyy_mm', 'date'),
+    )
+
 class FactShift(db.Model):
     __tablename__ = 'fact_shifts'
     
@@ -121,6 +171,87 @@ class FactShift(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class FactShiftDaily(db.Model):
+    """
+    FactShift pre-summed per (date, client, job). Dashboard aggregates that
+    need no per-shift or per-employee detail read this instead of fact_shifts.
+    Every fact_shifts write must ``refresh`` the dates it touched.
+    """
+    __tablename__ = 'fact_shift_daily'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    date_id = db.Column(db.Integer, db.ForeignKey('dim_dates.date_id'), nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey('dim_clients.client_id'))
+    job_id = db.Column(db.Integer, db.ForeignKey('dim_jobs.job_id'))
+    
+    shift_count = db.Column(db.Integer, nullable=False)
+    paid_hours = db.Column(db.Float)
+    client_net = db.Column(db.Float)
+    total_pay = db.Column(db.Float)
+    # Newest fact row summed in
+    last_shift_record_id = db.Column(db.Integer, nullable=False)
+    
+    __table_args__ = (
+        db.Index('idx_fact_shift_daily_date_client_job', 'date_id', 'client_id', 'job_id'),
+        db.Index('idx_fact_shift_daily_last_shift', 'last_shift_record_id'),
+    )
+    
+    @classmethod
+    def refresh(cls, date_ids=None):
+        """Re-sum fact_shifts into the rollup for ``date_ids`` (every date if None)."""
+        source = select(
+            FactShift.date_id,
+            FactShift.client_id,
+            FactShift.job_id,
+            func.count(FactShift.shift_record_id),
+            func.sum(FactShift.paid_hours),
+            func.sum(FactShift.client_net),
+            func.sum(FactShift.total_pay),
+            func.max(FactShift.shift_record_id)
+        ).where(FactShift.date_id.is_not(None))\
+         .group_by(FactShift.date_id, FactShift.client_id, FactShift.job_id)
+        clear = delete(cls)
+        if date_ids is not None:
+            date_ids = list(date_ids)
+            source = source.where(FactShift.date_id.in_(date_ids))
+            clear = clear.where(cls.date_id.in_(date_ids))
+        
+        db.session.execute(clear)
+        db.session.execute(insert(cls).from_select(
+            ['date_id', 'client_id', 'job_id', 'shift_count',
+             'paid_hours', 'client_net', 'total_pay', 'last_shift_record_id'],
+            source
+        ))
+        DataVersion.bump(DataVersion.FACTS)
+        db.session.commit()
+
+class DataVersion(db.Model):
+    """
+    Write counters the dashboard caches key on. Stored in the database so
+    every worker process sees a bump as soon as it is committed.
+    """
+    __tablename__ = 'data_versions'
+    
+    FACTS = 'fact_shifts'
+    FINANCIAL_METRICS = 'financial_metrics'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def current(cls, name):
+        """Committed version of ``name`` (0 before its first bump)."""
+        return db.session.query(cls.version).filter_by(name=name).scalar() or 0
+    
+    @classmethod
+    def bump(cls, name):
+        """Increment ``name`` within the caller's transaction."""
+        stmt = pg_insert(cls).values(name=name, version=1)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[cls.name],
+            set_={"version": cls.version + 1},
+        ))
+
 class PayBandSettings(db.Model):
     __tablename__ = 'pay_band_settings'
     
@@ -148,12 +279,23 @@ class ShiftTarget(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+MONTH_NUM_SQL = (
+    "CASE month "
+    "WHEN 'January' THEN 1 WHEN 'February' THEN 2 WHEN 'March' THEN 3 "
+    "WHEN 'April' THEN 4 WHEN 'May' THEN 5 WHEN 'June' THEN 6 "
+    "WHEN 'July' THEN 7 WHEN 'August' THEN 8 WHEN 'September' THEN 9 "
+    "WHEN 'October' THEN 10 WHEN 'November' THEN 11 WHEN 'December' THEN 12 "
+    "END"
+)
+
 class FinancialMetric(db.Model):
     __tablename__ = 'financial_metrics'
     
     id = db.Column(db.Integer, primary_key=True)
     year = db.Column(db.Integer, nullable=False)
     month = db.Column(db.String(20), nullable=False)
+    # 1-12, derived from the month name by the database (see migrate_financial_month_num.py)
+    month_num = db.Column(db.SmallInteger, db.Computed(MONTH_NUM_SQL, persisted=True))
     name = db.Column(db.String(100), nullable=False) # e.g., "Overheads", "Marketing Spend"
     value = db.Column(db.Float, default=0.0)
     
@@ -163,6 +305,25 @@ class FinancialMetric(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.CheckConstraint('month_num BETWEEN 1 AND 12', name='ck_financial_metrics_month_num'),
+        db.Index('idx_financial_metrics_period', 'year', 'month_num', 'location', 'site'),
+        # One value per metric cell; global rows have NULL location/site, so
+        # the scope columns are COALESCEd for ON CONFLICT to match them
+        db.Index(
+            'uq_financial_metrics_cell', 'name', 'year', 'month',
+            func.coalesce(location, ''), func.coalesce(site, ''), unique=True,
+        ),
+    )
+
+    @classmethod
+    def conflict_target(cls):
+        """index_elements for upserts against uq_financial_metrics_cell."""
+        return [
+            cls.name, cls.year, cls.month,
+            func.coalesce(cls.location, ''), func.coalesce(cls.site, ''),
+        ]
+
 class FinancialSummaryOverride(db.Model):
     """Stores manual cell overrides for the Financial Summary spreadsheet."""
     __tablename__ = 'financial_summary_overrides'
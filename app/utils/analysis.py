@@ -34,17 +34,14 @@ def compute_kpis(df: pd.DataFrame) -> Dict:
 def timeseries_by(df: pd.DataFrame, freq: str = "D") -> Dict:
     if df.empty:
         return {"x": [], "total_pay": [], "client_net": [], "paid_hours": []}
-    ts = df.copy()
+    # Copy only the summed columns, not the whole record frame
+    cols = ["date", "total_pay", "client_net", "paid_hours"]
+    ts = df.loc[:, cols].copy()
     ts["date"] = pd.to_datetime(ts["date"])  # ensure datetime
-    grouped = (
-        ts.set_index("date")
-        .resample(freq)
-        .agg({"total_pay": "sum", "client_net": "sum", "paid_hours": "sum"})
-        .fillna(0)
-    )
-    grouped.index = grouped.index.strftime("%Y-%m-%d")
+    # Empty bins sum to 0
+    grouped = ts.set_index("date").resample(freq).sum()
     return {
-        "x": grouped.index.tolist(),
+        "x": grouped.index.strftime("%Y-%m-%d").tolist(),
         "total_pay": grouped["total_pay"].round(2).tolist(),
         "client_net": grouped["client_net"].round(2).tolist(),
         "paid_hours": grouped["paid_hours"].round(2).tolist(),
@@ -1,25 +1,29 @@
 ﻿import pandas as pd
 from datetime import datetime
+import io
 import os
-from sqlalchemy import text
-from app.models import db, DimEmployee, DimClient, DimJob, DimShift, DimDate, FactShift
+from openpyxl import load_workbook
+from sqlalchemy import insert, text
+from app.models import db, DimEmployee, DimClient, DimJob, DimShift, DimDate, FactShift, FactShiftDaily
 
 class dbDataLoader:    
-    def __init__(self, excluded_locations=None, excluded_clients=None):
+    def __init__(self, excluded_locations=None, excluded_clients=None, drop_indexes=False):
         self.db_type = "PostgreSQL"
         # Accept exclusions from caller, default to empty lists
         self.excluded_locations = excluded_locations or []
         self.excluded_clients = excluded_clients or []
+        # Rebuild fact_shifts' secondary indexes once instead of maintaining them per row
+        self.drop_indexes = drop_indexes
     
-    def load_excel_data(self, file_path):
-        """BULK load Excel data - generator for progress updates"""
+    def load_excel_data(self, source):
+        """BULK load Excel data (path or binary file object) - generator for progress updates"""
         yield {"status": "progress", "message": "🚀 Starting BULK data load...", "progress": 0}
         start_time = datetime.now()
         
         try:
             # Read Excel file
             yield {"status": "progress", "message": "📄 Reading Excel file...", "progress": 5}
-            df = pd.read_excel(file_path)
+            df = self._read_sheet(source)
             yield {"status": "progress", "message": f"✓ Loaded {len(df):,} rows from Excel", "progress": 10}
             
             # Filter out unwanted data
@@ -76,6 +80,10 @@ class dbDataLoader:
             facts_created, skipped_details = self._bulk_create_facts(df, employees_map, clients_map, jobs_map, shifts_map, dates_map)
             yield {"status": "progress", "message": f"   Fact Shifts: {facts_created:,} records", "progress": 90}
             
+            # Re-sum the uploaded dates into the dashboard rollup
+            FactShiftDaily.refresh(dates_map.values())
+            yield {"status": "progress", "message": f"   Daily rollup: {len(dates_map):,} dates refreshed", "progress": 92}
+            
             # STEP 3: Verify data
             elapsed = (datetime.now() - start_time).total_seconds()
             yield {"status": "progress", "message": f"✓ BULK LOAD COMPLETE in {elapsed:.2f} seconds", "progress": 95}
@@ -98,6 +106,32 @@ class dbDataLoader:
             traceback.print_exc()
             yield {"status": "error", "message": f"💥 Critical error: {str(e)}"}
     
+    def _read_sheet(self, source):
+        """Read the first worksheet into a DataFrame via openpyxl's read-only stream.
+
+        ``source`` may be a path or a binary file object. Rows are pulled off
+        the worksheet as plain value tuples, so the workbook DOM is never
+        built; trailing blank rows are trimmed the same way pandas does.
+        """
+        wb = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return pd.DataFrame()
+            columns = [
+                name if name is not None else f"Unnamed: {i}"
+                for i, name in enumerate(header)
+            ]
+            width = len(columns)
+            records = [row[:width] + (None,) * (width - len(row)) for row in rows]
+        finally:
+            wb.close()
+        
+        while records and all(v is None for v in records[-1]):
+            records.pop()
+        return pd.DataFrame.from_records(records, columns=columns)
+    
     def _bulk_create_employees(self, employees_df):
         """Bulk create employees and return mapping - FIXED to reuse existing"""
         employees_map = {}
@@ -375,8 +409,8 @@ class dbDataLoader:
         # Track duplicates within current file
         seen_in_current_file = {}
         
-        # Process each row
-        for idx, row in df.iterrows():
+        # Process each row as a plain dict (iterrows builds a Series per row)
+        for idx, row in zip(df.index, df.to_dict(orient='records')):
             # Get foreign keys
             full_name = self._clean_string(row['full_name'], "Unknown Employee")
             client_name = self._clean_string(row['client'], "Unknown Client")
@@ -481,17 +515,69 @@ class dbDataLoader:
         
         # Bulk insert
         total_inserted = 0
-        if fact_records:
-            batch_size = 1000
+        if fact_records and db.engine.dialect.driver == 'psycopg2':
+            total_inserted = self._copy_facts(fact_records)
+            print(f"Copied {total_inserted:,} records into fact_shifts")
+        elif fact_records:
+            batch_size = 5000
             for i in range(0, len(fact_records), batch_size):
                 batch = fact_records[i:i + batch_size]
-                db.session.bulk_insert_mappings(FactShift, batch)
+                db.session.execute(insert(FactShift), batch)
                 db.session.commit()
                 total_inserted += len(batch)
                 print(f"Inserted batch {i//batch_size + 1}: {len(batch):,} records")
         
         return total_inserted, skipped_details
     
+    def _copy_facts(self, fact_records):
+        """Stream fact records into fact_shifts with a single COPY FROM STDIN"""
+        columns = list(fact_records[0].keys()) + ['created_at']
+        created_at = datetime.utcnow()
+        
+        buffer = io.StringIO()
+        for record in fact_records:
+            values = [*record.values(), created_at]
+            buffer.write('\t'.join(self._copy_value(v) for v in values))
+            buffer.write('\n')
+        buffer.seek(0)
+        
+        # Secondary (non-constraint) indexes, recreated from their own definitions
+        dropped_indexes = []
+        if self.drop_indexes:
+            dropped_indexes = db.session.execute(text("""
+                SELECT i.indexname, i.indexdef
+                FROM pg_indexes i
+                WHERE i.schemaname = current_schema()
+                AND i.tablename = 'fact_shifts'
+                AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname)
+            """)).all()
+            for name, _ in dropped_indexes:
+                db.session.execute(text(f'DROP INDEX "{name}"'))
+        
+        # COPY runs on the session's own connection so it commits with the session
+        cursor = db.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY fact_shifts ({', '.join(columns)}) FROM STDIN", buffer)
+        finally:
+            cursor.close()
+        
+        # Same transaction as the DROPs: a failed load rolls the indexes back too
+        for _, definition in dropped_indexes:
+            db.session.execute(text(definition))
+        if dropped_indexes:
+            print(f"Rebuilt {len(dropped_indexes)} fact_shifts indexes")
+        db.session.commit()
+        return len(fact_records)
+    
+    def _copy_value(self, value):
+        """Render a value in COPY text format (\\N for NULL, escaped tabs/newlines)"""
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+    
     def _filter_unwanted_data(self, df):
         """Filter out rows with excluded locations or clients"""
         original_count = len(df)
@@ -643,33 +729,25 @@ class dbDataLoader:
         try:
             from sqlalchemy import text
             
-            # Ensure numeric columns are actually numeric
-            df['client_net'] = pd.to_numeric(df['client_net'], errors='coerce').fillna(0)
-            df['total_pay'] = pd.to_numeric(df['total_pay'], errors='coerce').fillna(0)
-            df['paid_hours'] = pd.to_numeric(df['paid_hours'], errors='coerce').fillna(0)
+            # Ensure numeric columns are actually numeric (one pass over the block)
+            numeric_cols = ['client_net', 'total_pay', 'paid_hours']
+            df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
             
             # Excel totals (Raw)
             raw_excel_revenue = df['client_net'].sum()
             excel_cost = df['total_pay'].sum()
             excel_hours = df['paid_hours'].sum()
             
-            # Calculate Skipped Revenue
-            skipped_revenue = 0
-            if skipped_details:
-                for item in skipped_details:
-                    should_subtract = False
-                    # Subtract if it was skipped due to missing keys
-                    if item.get('reason') == 'Missing Keys':
-                        should_subtract = True
-                    # Subtract if it was a duplicate WITHIN the file (intra-file)
-                    elif item.get('reason') == 'Duplicate' and item.get('duplicate_type') == 'intra_file':
-                        should_subtract = True
-                    
-                    if should_subtract:
-                        row_idx = item['row'] - 2 # Convert back to 0-based index
-                        if 0 <= row_idx < len(df):
-                            val = df.iloc[row_idx]['client_net']
-                            skipped_revenue += val
+            # Calculate Skipped Revenue: rows skipped for missing keys or as a
+            # duplicate WITHIN the file (intra-file). Row numbers are the
+            # frame's index labels + 2, so look them up by label.
+            skipped_rows = [
+                item['row'] - 2
+                for item in (skipped_details or [])
+                if item.get('reason') == 'Missing Keys'
+                or (item.get('reason') == 'Duplicate' and item.get('duplicate_type') == 'intra_file')
+            ]
+            skipped_revenue = df['client_net'].reindex(skipped_rows).sum() if skipped_rows else 0
             
             adjusted_excel_revenue = raw_excel_revenue - skipped_revenue
             
@@ -748,6 +826,7 @@ class dbDataLoader:
             result = db.session.execute(sql)
             db.session.commit()
             print(f"✓ Removed {result.rowcount} duplicate rows from fact_shifts")
+            FactShiftDaily.refresh()
         except Exception as e:
             print(f"Error cleaning duplicates: {e}")
             db.session.rollback()
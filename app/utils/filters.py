@@ -3,6 +3,21 @@ from flask_login import current_user
 from sqlalchemy import text, or_
 from app.models import DimJob, DimClient, FactShift, DimEmployee
 
+def _is_joined(query, model):
+    """
+    True if ``model``'s table is already joined to, or selected from, ``query``.
+    SQLAlchemy 2.0 records join targets as annotated tables rather than the
+    mapped class, so compare against the de-annotated table.
+    """
+    table = model.__table__
+    for join in getattr(query, '_setup_joins', ()):
+        target = join[0]
+        if target is model or getattr(target, 'class_', None) is model:
+            return True
+        if hasattr(target, '_deannotate') and target._deannotate() is table:
+            return True
+    return any(desc['entity'] is model for desc in query.column_descriptions)
+
 def apply_dashboard_filters(query):
     """
     Unified utility to apply location and site filtering based on user role 
@@ -11,56 +26,22 @@ def apply_dashboard_filters(query):
     requested_clients = request.args.getlist("clients")
     requested_locations = request.args.getlist("locations")
     requested_sites = request.args.getlist("sites")
+    # None for admins, else the user's locations (resolved once per loaded user)
+    user_locations = user_location_scope()
+    
+    # Unfiltered admin views have nothing to add
+    if user_locations is None and not (requested_clients or requested_locations or requested_sites):
+        return query
     
-    # helper to safely join DimJob only if not already present
     def ensure_dim_job(q):
-        # Check current joins to avoid DuplicateAlias
-        is_joined = False
-        if hasattr(q, '_setup_joins'):
-            for join in q._setup_joins:
-                target = join[0]
-                if hasattr(target, 'class_') and target.class_ == DimJob:
-                    is_joined = True
-                    break
-                if target == DimJob:
-                    is_joined = True
-                    break
-                    
-        # Also check column_descriptions if it was selected in the FROM
-        if not is_joined:
-            for desc in q.column_descriptions:
-                entity = desc['entity']
-                if entity == DimJob:
-                    is_joined = True
-                    break
-                    
-        if not is_joined:
-            return q.join(DimJob, FactShift.job_id == DimJob.job_id)
-        return q
+        if _is_joined(q, DimJob):
+            return q
+        return q.join(DimJob, FactShift.job_id == DimJob.job_id)
 
-    # helper safely join DimClient
     def ensure_dim_client(q):
-        is_joined = False
-        if hasattr(q, '_setup_joins'):
-            for join in q._setup_joins:
-                target = join[0]
-                if hasattr(target, 'class_') and target.class_ == DimClient:
-                    is_joined = True
-                    break
-                if target == DimClient:
-                    is_joined = True
-                    break
-        
-        if not is_joined:
-             for desc in q.column_descriptions:
-                entity = desc['entity']
-                if entity == DimClient:
-                    is_joined = True
-                    break
-                    
-        if not is_joined:
-            return q.join(DimClient, FactShift.client_id == DimClient.client_id)
-        return q
+        if _is_joined(q, DimClient):
+            return q
+        return q.join(DimClient, FactShift.client_id == DimClient.client_id)
 
     # 0. Handle Client Filtering
     if requested_clients:
@@ -72,20 +53,17 @@ def apply_dashboard_filters(query):
     # 1. User is NOT admin (needs location security)
     # 2. Locations are requested
     # 3. Sites are requested
-    need_dim_job = (current_user.role != 'admin') or requested_locations or requested_sites
+    need_dim_job = (user_locations is not None) or requested_locations or requested_sites
     
     if need_dim_job:
         query = ensure_dim_job(query)
 
     # 1. Handle Role-Based & Requested Location Filtering
-    if current_user.role == 'admin':
+    if user_locations is None:
         if requested_locations:
              query = query.filter(DimJob.location.in_(requested_locations))
     else:
         # Non-admins: Security intersection
-        import json
-        user_locations = json.loads(current_user.location) if current_user.location else []
-        
         if not user_locations:
             # If manager has no locations, they see nothing
             return query.filter(text("1=0"))
@@ -110,3 +88,26 @@ def apply_dashboard_filters(query):
         query = query.filter(DimJob.site.in_(requested_sites))
         
     return query
+
+
+def user_location_scope():
+    """
+    Locations the current user may see. None means unrestricted (admin);
+    otherwise ``User.parsed_locations``, which is parsed once per loaded user.
+    """
+    if current_user.role == 'admin':
+        return None
+    return current_user.parsed_locations
+
+def apply_location_rbac(query, location_col):
+    """
+    Restrict ``query`` to rows whose ``location_col`` is exactly one of the
+    current user's locations. The caller must already have the column's
+    table joined.
+    """
+    user_locations = user_location_scope()
+    if user_locations is None:
+        return query
+    if not user_locations:
+        return query.filter(text("1=0"))
+    return query.filter(location_col.in_(user_locations))
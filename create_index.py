@@ -25,13 +25,19 @@ def create_performance_indexes():
             "CREATE INDEX IF NOT EXISTS idx_employee_name ON dim_employees(full_name)",
             "CREATE INDEX IF NOT EXISTS idx_client_name ON dim_clients(client_name)",
             "CREATE INDEX IF NOT EXISTS idx_job_name ON dim_jobs(job_name)",
-            "CREATE INDEX IF NOT EXISTS idx_job_location ON dim_jobs(location)",
+            "CREATE INDEX IF NOT EXISTS idx_job_location_site ON dim_jobs(location, site)",
             "CREATE INDEX IF NOT EXISTS idx_date_date ON dim_dates(date)",
             "CREATE INDEX IF NOT EXISTS idx_date_month ON dim_dates(month)",
             
-            # Composite indexes for common queries
-            "CREATE INDEX IF NOT EXISTS idx_fact_dates_client ON fact_shifts(date_id, client_id)",
-            "CREATE INDEX IF NOT EXISTS idx_fact_dates_employee ON fact_shifts(date_id, employee_id)",
+            # Covering indexes so dashboard aggregations can be index-only scans
+            "CREATE INDEX IF NOT EXISTS idx_fact_date_client_covering ON fact_shifts(date_id, client_id) "
+            "INCLUDE (client_net, total_pay, paid_hours, shift_record_id)",
+            "CREATE INDEX IF NOT EXISTS idx_fact_date_employee_covering ON fact_shifts(date_id, employee_id) "
+            "INCLUDE (paid_hours, total_pay, shift_record_id)",
+            "CREATE INDEX IF NOT EXISTS idx_fact_date_job_covering ON fact_shifts(date_id, job_id) "
+            "INCLUDE (client_net, total_pay, paid_hours, shift_record_id, client_id, employee_id)",
+            "CREATE INDEX IF NOT EXISTS idx_date_date_covering ON dim_dates(date) INCLUDE (year, month, date_id)",
+            "CREATE INDEX IF NOT EXISTS idx_financial_year_month ON financial_metrics(year, month, location, site) INCLUDE (value)",
         ]
         
         for index_sql in indexes:
@@ -41,6 +47,15 @@ def create_performance_indexes():
             except Exception as e:
                 print(f"❌ Failed to create index: {e}")
         
+        # Plain composites superseded by the covering indexes above
+        for index_name in ("idx_fact_dates_client", "idx_fact_dates_employee", "idx_job_location"):
+            db.session.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+            print(f"🗑️  Dropped superseded index: {index_name}")
+        
+        # Refresh planner statistics so the new indexes are considered
+        db.session.execute(text("ANALYZE fact_shifts"))
+        db.session.execute(text("ANALYZE dim_jobs"))
+        
         db.session.commit()
         print("🎉 All indexes created successfully!")
 
@@ -0,0 +1,15 @@
+"""
+Gunicorn settings, picked up automatically from the working directory
+(``gunicorn --bind 0.0.0.0:$PORT run:app``).
+
+The dashboard page fires its chart endpoints in parallel. With gunicorn's
+default of one single-threaded sync worker they queue behind each other,
+so run threaded workers: each chart request mostly waits on PostgreSQL,
+and threads let those waits overlap within one process (and one
+SQLAlchemy connection pool) without extra worker memory.
+"""
+import os
+
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+worker_class = "gthread"
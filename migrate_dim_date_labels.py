@@ -0,0 +1,65 @@
+"""
+Migration script to add precomputed period labels to dim_dates.
+
+month_label ('Mon YYYY'), year_label ('YYYY') and yyyy_mm ('YYYY-MM') are
+stored generated columns derived from the date text, so the loader keeps
+inserting dates unchanged and existing rows are backfilled by Postgres.
+Requires PostgreSQL 12+.
+"""
+from app import create_app
+from app.models import db, MONTH_LABEL_SQL, YEAR_LABEL_SQL, YYYY_MM_SQL
+from sqlalchemy import text, inspect
+
+LABEL_COLUMNS = (
+    ("month_label", "VARCHAR(8)", MONTH_LABEL_SQL),
+    ("year_label", "VARCHAR(4)", YEAR_LABEL_SQL),
+    ("yyyy_mm", "VARCHAR(7)", YYYY_MM_SQL),
+)
+
+def migrate():
+    print("Starting migration: Add period labels to dim_dates")
+    
+    app = create_app()
+    
+    with app.app_context():
+        inspector = inspect(db.engine)
+        
+        # Check if table exists
+        if not inspector.has_table('dim_dates'):
+            print("Creating dim_dates table...")
+            # Let SQLAlchemy create the table from the model
+            db.create_all()
+            print("Table created successfully.")
+            return
+        
+        columns = [col['name'] for col in inspector.get_columns('dim_dates')]
+        
+        for name, sql_type, expression in LABEL_COLUMNS:
+            if name in columns:
+                print(f"✓ '{name}' column already exists")
+                continue
+            print(f"Adding '{name}' column...")
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text(
+                        f"ALTER TABLE dim_dates ADD COLUMN {name} {sql_type} "
+                        f"GENERATED ALWAYS AS ({expression}) STORED"
+                    ))
+                    conn.commit()
+                print(f"✓ '{name}' column added")
+            except Exception as e:
+                print(f"Error adding '{name}' column: {e}")
+        
+        print("Creating index idx_dim_dates_yyyy_mm...")
+        with db.engine.connect() as conn:
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_dim_dates_yyyy_mm "
+                "ON dim_dates (yyyy_mm, date)"
+            ))
+            conn.commit()
+        print("✓ Index ready")
+        
+        print("\nMigration complete!")
+
+if __name__ == "__main__":
+    migrate()
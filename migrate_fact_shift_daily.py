@@ -0,0 +1,41 @@
+"""
+Migration script to create and backfill the fact_shift_daily rollup.
+
+The dashboards read pre-summed (date, client, job) rows from this table
+for revenue, cost and shift-count aggregates. The loader keeps it in step
+for every upload; run this once to create it and sum in existing shifts
+(re-running rebuilds it from fact_shifts).
+"""
+from app import create_app
+from app.models import db, FactShift, FactShiftDaily
+from sqlalchemy import func, inspect, text
+
+def migrate():
+    print("Starting migration: Create fact_shift_daily rollup")
+    
+    app = create_app()
+    
+    with app.app_context():
+        inspector = inspect(db.engine)
+        
+        if inspector.has_table('fact_shift_daily'):
+            print("✓ 'fact_shift_daily' table already exists")
+        else:
+            print("Creating fact_shift_daily table...")
+            FactShiftDaily.__table__.create(db.engine)
+            print("✓ Table created")
+        
+        print("Summing fact_shifts into the rollup...")
+        FactShiftDaily.refresh()
+        db.session.execute(text("ANALYZE fact_shift_daily"))
+        db.session.commit()
+        
+        facts = db.session.query(func.count(FactShift.shift_record_id)).scalar()
+        rolled = db.session.query(func.sum(FactShiftDaily.shift_count)).scalar() or 0
+        rows = db.session.query(func.count(FactShiftDaily.id)).scalar()
+        print(f"✓ {rows:,} rollup rows covering {rolled:,} of {facts:,} shifts")
+        
+        print("\nMigration complete!")
+
+if __name__ == "__main__":
+    migrate()
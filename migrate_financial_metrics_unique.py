@@ -0,0 +1,53 @@
+"""
+Migration script to make financial_metrics cells unique.
+
+The financial summary save upserts every cell in one
+INSERT ... ON CONFLICT statement, which needs a unique index on
+(name, year, month, location, site). Global metrics have NULL
+location/site, so the index COALESCEs them to ''. Duplicate cells left by
+the old find-or-create saves are removed first, keeping the newest row.
+"""
+from app import create_app
+from app.models import db
+from sqlalchemy import text, inspect
+
+def migrate():
+    print("Starting migration: Unique financial_metrics cells")
+
+    app = create_app()
+
+    with app.app_context():
+        inspector = inspect(db.engine)
+
+        if not inspector.has_table('financial_metrics'):
+            print("Creating financial_metrics table...")
+            db.create_all()
+            print("Table created successfully.")
+            return
+
+        print("Removing duplicate cells...")
+        with db.engine.connect() as conn:
+            result = conn.execute(text(
+                "DELETE FROM financial_metrics f "
+                "USING financial_metrics newer "
+                "WHERE newer.name = f.name AND newer.year = f.year AND newer.month = f.month "
+                "AND COALESCE(newer.location, '') = COALESCE(f.location, '') "
+                "AND COALESCE(newer.site, '') = COALESCE(f.site, '') "
+                "AND newer.id > f.id"
+            ))
+            conn.commit()
+        print(f"✓ {result.rowcount} duplicate rows removed")
+
+        print("Creating index uq_financial_metrics_cell...")
+        with db.engine.connect() as conn:
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_financial_metrics_cell "
+                "ON financial_metrics (name, year, month, COALESCE(location, ''), COALESCE(site, ''))"
+            ))
+            conn.commit()
+        print("✓ Index ready")
+
+        print("\nMigration complete!")
+
+if __name__ == "__main__":
+    migrate()
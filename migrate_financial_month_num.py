@@ -0,0 +1,61 @@
+"""
+Migration script to add a numeric month to financial_metrics.
+
+month_num is a stored generated column derived from the month name, so
+existing writers keep saving month names and the database fills it in.
+Requires PostgreSQL 12+.
+"""
+from app import create_app
+from app.models import db, MONTH_NUM_SQL
+from sqlalchemy import text, inspect
+
+def migrate():
+    print("Starting migration: Add month_num to financial_metrics")
+    
+    app = create_app()
+    
+    with app.app_context():
+        inspector = inspect(db.engine)
+        
+        # Check if table exists
+        if not inspector.has_table('financial_metrics'):
+            print("Creating financial_metrics table...")
+            # Let SQLAlchemy create the table from the model
+            db.create_all()
+            print("Table created successfully.")
+            return
+        
+        columns = [col['name'] for col in inspector.get_columns('financial_metrics')]
+        
+        if 'month_num' not in columns:
+            print("Adding 'month_num' column...")
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text(
+                        f"ALTER TABLE financial_metrics ADD COLUMN month_num SMALLINT "
+                        f"GENERATED ALWAYS AS ({MONTH_NUM_SQL}) STORED"
+                    ))
+                    conn.execute(text(
+                        "ALTER TABLE financial_metrics ADD CONSTRAINT ck_financial_metrics_month_num "
+                        "CHECK (month_num BETWEEN 1 AND 12)"
+                    ))
+                    conn.commit()
+                print("✓ 'month_num' column added")
+            except Exception as e:
+                print(f"Error adding 'month_num' column: {e}")
+        else:
+            print("✓ 'month_num' column already exists")
+        
+        print("Creating index idx_financial_metrics_period...")
+        with db.engine.connect() as conn:
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_financial_metrics_period "
+                "ON financial_metrics (year, month_num, location, site)"
+            ))
+            conn.commit()
+        print("✓ Index ready")
+        
+        print("\nMigration complete!")
+
+if __name__ == "__main__":
+    migrate()